@@ -2,13 +2,15 @@
 Module for goniometers and sample stages used with them.
 """
 import logging
+import math
+import typing
 
 import numpy as np
 from ophyd import Device
 from ophyd import FormattedComponent as FCpt
 from ophyd.device import Component as Cpt
 from ophyd.status import DeviceStatus
-from prettytable import PrettyTable
+from ophyd.utils import LimitError
 
 from .epics_motor import IMS
 from .interface import BaseInterface
@@ -20,7 +22,41 @@ from .utils import get_status_float, get_status_value
 logger = logging.getLogger(__name__)
 
 
-class BaseGon(BaseInterface, Device):
+class _LazyMotorsMixin:
+    """
+    Mix-in for devices whose motors are lazy components.
+
+    ``Device.connected`` only checks the motors that have already been
+    created, so this checks every motor, creating any that are missing.
+    Plain ``wait_for_connection()`` still only waits on created motors;
+    use ``connect_all`` to wait on all of them.
+    """
+
+    tab_whitelist = ['connect_all']
+
+    @property
+    def connected(self):
+        return (all(walk.item.connected
+                    for walk in self.walk_signals(include_lazy=True))
+                and super().connected)
+
+    def connect_all(self, timeout=5.0):
+        """
+        Connect to every motor at once, including ones not yet accessed.
+
+        All of the underlying PVs are created up front and then waited on
+        together, so the total wait is roughly one connection time rather
+        than one per motor.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Overall time to wait for the connections, in seconds.
+        """
+        self.wait_for_connection(all_signals=True, timeout=timeout)
+
+
+class BaseGon(BaseInterface, _LazyMotorsMixin, Device):
     """
     Basic goniometer, as present in XPP.
 
@@ -48,11 +84,14 @@ class BaseGon(BaseInterface, Device):
         The EPICS base PV of the sample-stage's tilt motor.
     """
 
-    hor = FCpt(IMS, '{self._prefix_hor}', kind='normal')
-    ver = FCpt(IMS, '{self._prefix_ver}', kind='normal')
-    rot = FCpt(IMS, '{self._prefix_rot}', kind='normal')
-    tip = FCpt(IMS, '{self._prefix_tip}', kind='normal')
-    tilt = FCpt(IMS, '{self._prefix_tilt}', kind='normal')
+    hor = FCpt(IMS, '{self._prefix_hor}', kind='normal', lazy=True)
+    ver = FCpt(IMS, '{self._prefix_ver}', kind='normal', lazy=True)
+    rot = FCpt(IMS, '{self._prefix_rot}', kind='normal', lazy=True)
+    tip = FCpt(IMS, '{self._prefix_tip}', kind='normal', lazy=True)
+    tilt = FCpt(IMS, '{self._prefix_tilt}', kind='normal', lazy=True)
+
+    # Create motors on first access without blocking on their connection
+    lazy_wait_for_connection = False
 
     tab_component_names = True
 
@@ -137,9 +176,9 @@ class GonWithDetArm(BaseGon):
         The EPICS base PV of the detector stage's vertical motor.
     """
 
-    rot_2theta = FCpt(IMS, '{self._prefix_2theta}', kind='normal')
-    det_tilt = FCpt(IMS, '{self._prefix_dettilt}', kind='normal')
-    det_ver = FCpt(IMS, '{self._prefix_detver}', kind='normal')
+    rot_2theta = FCpt(IMS, '{self._prefix_2theta}', kind='normal', lazy=True)
+    det_tilt = FCpt(IMS, '{self._prefix_dettilt}', kind='normal', lazy=True)
+    det_ver = FCpt(IMS, '{self._prefix_detver}', kind='normal', lazy=True)
 
     def __init__(self, *, name, prefix_2theta, prefix_dettilt, prefix_detver,
                  prefix_hor, prefix_ver, prefix_rot, prefix_tip, prefix_tilt,
@@ -153,6 +192,10 @@ class GonWithDetArm(BaseGon):
                          **kwargs)
 
 
+# Goniometer picks GonWithDetArm when all of these prefixes are given
+_DET_ARM_KEYS = frozenset({'prefix_2theta', 'prefix_dettilt', 'prefix_detver'})
+
+
 def Goniometer(**kwargs):
     """
     Factory function for Goniometers.
@@ -194,14 +237,13 @@ def Goniometer(**kwargs):
         The EPICS base PV of the detector stage's vertical motor.
     """
 
-    if all(x in kwargs for x in ['prefix_2theta', 'prefix_dettilt',
-                                 'prefix_detver']):
+    if _DET_ARM_KEYS <= kwargs.keys():
         return GonWithDetArm(**kwargs)
     else:
         return BaseGon(**kwargs)
 
 
-class XYZStage(BaseInterface, Device):
+class XYZStage(BaseInterface, _LazyMotorsMixin, Device):
     """
     Sample XYZ stage.
 
@@ -220,9 +262,12 @@ class XYZStage(BaseInterface, Device):
         The EPICS base PV of the sample-stage's z motor.
     """
 
-    x = FCpt(IMS, '{self._prefix_x}', kind='normal')
-    y = FCpt(IMS, '{self._prefix_y}', kind='normal')
-    z = FCpt(IMS, '{self._prefix_z}', kind='normal')
+    x = FCpt(IMS, '{self._prefix_x}', kind='normal', lazy=True)
+    y = FCpt(IMS, '{self._prefix_y}', kind='normal', lazy=True)
+    z = FCpt(IMS, '{self._prefix_z}', kind='normal', lazy=True)
+
+    # Create motors on first access without blocking on their connection
+    lazy_wait_for_connection = False
 
     tab_component_names = True
 
@@ -256,7 +301,7 @@ class KappaXYZStage(XYZStage):
                          **kwargs)
 
 
-class SamPhi(BaseInterface, Device):
+class SamPhi(BaseInterface, _LazyMotorsMixin, Device):
     """
     Sample Phi stage.
 
@@ -272,8 +317,11 @@ class SamPhi(BaseInterface, Device):
         The EPICS base PV of the Sample Phi stage's phi motor.
     """
 
-    sam_z = FCpt(IMS, '{self._prefix_samz}', kind='normal')
-    sam_phi = FCpt(IMS, '{self._prefix_samphi}', kind='normal')
+    sam_z = FCpt(IMS, '{self._prefix_samz}', kind='normal', lazy=True)
+    sam_phi = FCpt(IMS, '{self._prefix_samphi}', kind='normal', lazy=True)
+
+    # Create motors on first access without blocking on their connection
+    lazy_wait_for_connection = False
 
     tab_component_names = True
 
@@ -288,7 +336,29 @@ class KappaMoveAbort(ValueError):
     pass
 
 
-class Kappa(BaseInterface, PseudoPositioner, Device):
+class EulerCoord(typing.NamedTuple):
+    """
+    Kappa position in spherical coordinates, in degrees.
+
+    Each field is a float, or an array from `Kappa.k_to_e_array`.
+    """
+    e_eta: typing.Union[float, np.ndarray]
+    e_chi: typing.Union[float, np.ndarray]
+    e_phi: typing.Union[float, np.ndarray]
+
+
+class KappaCoord(typing.NamedTuple):
+    """
+    Kappa position in native motor coordinates, in degrees.
+
+    Each field is a float, or an array from `Kappa.e_to_k_array`.
+    """
+    eta: typing.Union[float, np.ndarray]
+    kappa: typing.Union[float, np.ndarray]
+    phi: typing.Union[float, np.ndarray]
+
+
+class Kappa(BaseInterface, _LazyMotorsMixin, PseudoPositioner, Device):
     """
     Kappa stage, control the Kappa diffractometer in spherical coordinates.
 
@@ -373,7 +443,16 @@ class Kappa(BaseInterface, PseudoPositioner, Device):
     e_phi = FCpt(PseudoSingleInterface, kind='normal', name='gon_kappa_e_phi')
     tab_component_names = True
 
-    tab_whitelist = ['stop', 'wait', 'k_to_e', 'e_to_k', 'check_motor_step']
+    _DEG2RAD = math.pi / 180.0
+    _RAD2DEG = 180.0 / math.pi
+
+    # Layout of the check_motor_step confirmation table
+    _ROW_FMT = '{:<8s} {:>16.4f} --> {:>16.4f}'
+    _ROW_HEADER = '{:<8s} {:>16s}     {:>16s}'.format(
+        'Motor', 'Current position', 'Target position')
+
+    tab_whitelist = ['stop', 'wait', 'k_to_e', 'e_to_k', 'k_to_e_array',
+                     'e_to_k_array', 'check_motor_step']
 
     def __init__(self, *, name, prefix_x, prefix_y, prefix_z,
                  prefix_eta, prefix_kappa, prefix_phi, eta_max_step=2,
@@ -389,33 +468,60 @@ class Kappa(BaseInterface, PseudoPositioner, Device):
         self.phi_max_step = phi_max_step
         self.kappa_ang = kappa_ang
         super().__init__('', name=name, **kwargs)
-        self.x = self.sample_stage.x
-        self.y = self.sample_stage.y
-        self.z = self.sample_stage.z
+
+    # Forward to the sample stage so its lazy motors are made on first use
+    @property
+    def x(self):
+        """The sample stage's x motor."""
+        return self.sample_stage.x
+
+    @property
+    def y(self):
+        """The sample stage's y motor."""
+        return self.sample_stage.y
+
+    @property
+    def z(self):
+        """The sample stage's z motor."""
+        return self.sample_stage.z
+
+    @property
+    def kappa_ang(self):
+        """The angle of the kappa motor relative to the eta motor, in deg."""
+        return self._kappa_ang
+
+    @kappa_ang.setter
+    def kappa_ang(self, kappa_ang):
+        # Cache the trig used by every k_to_e/e_to_k conversion
+        self._kappa_ang = kappa_ang
+        self._kappa_ang_rad = math.radians(kappa_ang)
+        self._cos_kappa = math.cos(self._kappa_ang_rad)
+        self._sin_kappa = math.sin(self._kappa_ang_rad)
+        self._tan_kappa = math.tan(self._kappa_ang_rad)
+        # Last (inputs, result) pair from k_to_e, stale once the angle moves
+        self._k_to_e_cache = (None, None)
 
     def wait(self, timeout=None):
         """Block until the action completes."""
-        self.eta.wait(timeout=timeout)
-        self.kappa.wait(timeout=timeout)
-        self.phi.wait(timeout=timeout)
+        # One combined status so timeout bounds the whole move, not each axis
+        status = (self.eta._last_status & self.kappa._last_status
+                  & self.phi._last_status)
+        status.wait(timeout=timeout)
 
     @property
     def e_eta_coord(self):
         """Get the azimuthal angle, an offset from eta."""
-        e_eta, e_chi, e_phi = self.k_to_e()
-        return e_eta
+        return self.k_to_e().e_eta
 
     @property
     def e_chi_coord(self):
         """Get the elevation (polar) angle, a composition of eta and kappa."""
-        e_eta, e_chi, e_phi = self.k_to_e()
-        return e_chi
+        return self.k_to_e().e_chi
 
     @property
     def e_phi_coord(self):
         """Get the sample rotation angle, an offset from phi to keep it."""
-        e_eta, e_chi, e_phi = self.k_to_e()
-        return e_phi
+        return self.k_to_e().e_phi
 
     def k_to_e(self, eta=None, kappa=None, phi=None):
         """
@@ -434,7 +540,7 @@ class Kappa(BaseInterface, PseudoPositioner, Device):
 
         Returns
         -------
-        coordinates : tuple
+        coordinates : EulerCoord
             Spherical coordinates.
         """
         if eta is None:
@@ -444,25 +550,31 @@ class Kappa(BaseInterface, PseudoPositioner, Device):
         if phi is None:
             phi = self.phi.position
 
-        kappa_ang = self.kappa_ang * np.pi / 180
-        delta = np.arctan(np.tan(kappa * np.pi / 180 / 2)
-                          * np.cos(kappa_ang))
+        # The e_*_coord properties all convert the same live position
+        flipped = self.kappa.position > 180
+        key = (eta, kappa, phi, flipped)
+        if key == self._k_to_e_cache[0]:
+            return self._k_to_e_cache[1]
+
+        half_kap = kappa * self._DEG2RAD * 0.5
+        delta = math.atan(math.tan(half_kap) * self._cos_kappa)
 
-        e_eta = -eta * np.pi / 180 - delta
-        e_chi = 2 * np.arcsin(np.sin(kappa * np.pi / 180 / 2)
-                              * np.sin(kappa_ang))
-        e_phi = -phi * np.pi / 180 - delta
+        e_eta = -eta * self._DEG2RAD - delta
+        e_chi = 2 * math.asin(math.sin(half_kap) * self._sin_kappa)
+        e_phi = -phi * self._DEG2RAD - delta
 
         # Phase shift for flipped kappa
-        if self.kappa.position > 180:
-            e_eta = np.pi - e_eta
+        if flipped:
+            e_eta = math.pi - e_eta
             e_chi = e_chi
-            e_phi = phi * np.pi / 180 - delta
+            e_phi = phi * self._DEG2RAD - delta
 
-        e_eta = e_eta * 180 / np.pi
-        e_chi = e_chi * 180 / np.pi
-        e_phi = e_phi * 180 / np.pi
-        return e_eta, e_chi, e_phi
+        e_eta = e_eta * self._RAD2DEG
+        e_chi = e_chi * self._RAD2DEG
+        e_phi = e_phi * self._RAD2DEG
+        coords = EulerCoord(e_eta, e_chi, e_phi)
+        self._k_to_e_cache = (key, coords)
+        return coords
 
     def e_to_k(self, e_eta=None, e_chi=None, e_phi=None):
         """
@@ -481,34 +593,130 @@ class Kappa(BaseInterface, PseudoPositioner, Device):
 
         Returns
         -------
-        coordinates : tuple
+        coordinates : KappaCoord
             Native kappa coordinates.
+
+        Raises
+        ------
+        LimitError
+            If e_chi cannot be reached with this kappa_ang.
         """
-        if e_eta is None:
-            e_eta = self.e_eta_coord
-        if e_chi is None:
-            e_chi = self.e_chi_coord
-        if e_phi is None:
-            e_phi = self.e_phi_coord
-
-        kappa_ang = self.kappa_ang * np.pi / 180
-        delta = np.arcsin(-np.tan(e_chi * np.pi / 180 / 2)
-                          / np.tan(kappa_ang))
-        k_eta = -(e_eta * np.pi / 180 - delta)
-        k_kap = 2 * np.arcsin(np.sin(e_chi * np.pi / 180 / 2)
-                              / np.sin(kappa_ang))
-        k_phi = e_phi * np.pi / 180 - delta
+        if e_eta is None or e_chi is None or e_phi is None:
+            # One live conversion covers every missing coordinate
+            live = self.k_to_e()
+            if e_eta is None:
+                e_eta = live.e_eta
+            if e_chi is None:
+                e_chi = live.e_chi
+            if e_phi is None:
+                e_phi = live.e_phi
+
+        half_chi = e_chi * self._DEG2RAD * 0.5
+        try:
+            delta = math.asin(-math.tan(half_chi) / self._tan_kappa)
+            k_kap = 2 * math.asin(math.sin(half_chi) / self._sin_kappa)
+        except ValueError:
+            raise LimitError(
+                f'e_chi={e_chi} is not reachable with '
+                f'kappa_ang={self.kappa_ang}'
+            ) from None
+        k_eta = -(e_eta * self._DEG2RAD - delta)
+        k_phi = e_phi * self._DEG2RAD - delta
+
+        # Phase shift for flipped kappa
+        if self.kappa.position > 180:
+            k_eta = -k_eta - math.pi
+            k_kap = 2 * math.pi - k_kap
+            k_phi = -e_phi * self._DEG2RAD - delta
+
+        k_eta = k_eta * self._RAD2DEG
+        k_kap = k_kap * self._RAD2DEG
+        k_phi = -k_phi * self._RAD2DEG
+        return KappaCoord(k_eta, k_kap, k_phi)
+
+    def k_to_e_array(self, eta, kappa, phi):
+        """
+        Vectorized version of `k_to_e` for many points at once.
+
+        Unlike `k_to_e`, all parameters are required, as there is no live
+        value to fall back on for an array of points. As in `k_to_e`, the
+        flipped kappa phase shift is chosen from the live kappa position and
+        applies to every point, not from each point's own kappa.
+
+        Parameters
+        ----------
+        eta : array_like
+            Eta motor positions.
+        kappa : array_like
+            Kappa motor positions.
+        phi : array_like
+            Phi motor positions.
+
+        Returns
+        -------
+        coordinates : EulerCoord
+            Spherical coordinates, one array per axis.
+        """
+        eta = np.asarray(eta, dtype=float)
+        half_kap = np.asarray(kappa, dtype=float) * self._DEG2RAD * 0.5
+        phi = np.asarray(phi, dtype=float)
+
+        delta = np.arctan(np.tan(half_kap) * self._cos_kappa)
+
+        e_eta = -eta * self._DEG2RAD - delta
+        e_chi = 2 * np.arcsin(np.sin(half_kap) * self._sin_kappa)
+        e_phi = -phi * self._DEG2RAD - delta
+
+        # Phase shift for flipped kappa
+        if self.kappa.position > 180:
+            e_eta = np.pi - e_eta
+            e_phi = phi * self._DEG2RAD - delta
+
+        return EulerCoord(e_eta * self._RAD2DEG, e_chi * self._RAD2DEG,
+                          e_phi * self._RAD2DEG)
+
+    def e_to_k_array(self, e_eta, e_chi, e_phi):
+        """
+        Vectorized version of `e_to_k` for many points at once.
+
+        Unlike `e_to_k`, all parameters are required, as there is no live
+        value to fall back on for an array of points. As in `e_to_k`, the
+        flipped kappa phase shift is chosen from the live kappa position and
+        applies to every point.
+
+        Parameters
+        ----------
+        e_eta : array_like
+            e_eta pseudo motor's spherical coordinates
+        e_chi : array_like
+            e_chi pseudo motor's spherical coordinates
+        e_phi : array_like
+            e_phi pseudo motor's spherical coordinates
+
+        Returns
+        -------
+        coordinates : KappaCoord
+            Native kappa coordinates, one array per axis. Points whose e_chi
+            cannot be reached with this kappa_ang are nan on every axis, with
+            a numpy RuntimeWarning, where `e_to_k` would raise LimitError.
+        """
+        e_eta = np.asarray(e_eta, dtype=float)
+        half_chi = np.asarray(e_chi, dtype=float) * self._DEG2RAD * 0.5
+        e_phi = np.asarray(e_phi, dtype=float)
+
+        delta = np.arcsin(-np.tan(half_chi) / self._tan_kappa)
+        k_eta = -(e_eta * self._DEG2RAD - delta)
+        k_kap = 2 * np.arcsin(np.sin(half_chi) / self._sin_kappa)
+        k_phi = e_phi * self._DEG2RAD - delta
 
         # Phase shift for flipped kappa
         if self.kappa.position > 180:
             k_eta = -k_eta - np.pi
             k_kap = 2 * np.pi - k_kap
-            k_phi = -e_phi * np.pi / 180 - delta
+            k_phi = -e_phi * self._DEG2RAD - delta
 
-        k_eta = k_eta * 180 / np.pi
-        k_kap = k_kap * 180 / np.pi
-        k_phi = -k_phi * 180 / np.pi
-        return k_eta, k_kap, k_phi
+        return KappaCoord(k_eta * self._RAD2DEG, k_kap * self._RAD2DEG,
+                          -k_phi * self._RAD2DEG)
 
     @pseudo_position_argument
     def forward(self, pseudo_pos):
@@ -524,7 +732,6 @@ class Kappa(BaseInterface, PseudoPositioner, Device):
         real_position : RealPosition
             The real position output.
         """
-        pseudo_pos = self.PseudoPosition(*pseudo_pos)
         eta, kappa, phi = self.e_to_k(pseudo_pos.e_eta, pseudo_pos.e_chi,
                                       pseudo_pos.e_phi)
         return self.RealPosition(eta=eta, kappa=kappa, phi=phi)
@@ -543,7 +750,6 @@ class Kappa(BaseInterface, PseudoPositioner, Device):
         pseudo_pos : PseudoPosition
             The pseudo position output.
         """
-        real_pos = self.RealPosition(*real_pos)
         e_eta, e_chi, e_phi = self.k_to_e(real_pos.eta, real_pos.kappa,
                                           real_pos.phi)
         return self.PseudoPosition(e_eta=e_eta, e_chi=e_chi, e_phi=e_phi)
@@ -578,7 +784,11 @@ class Kappa(BaseInterface, PseudoPositioner, Device):
         if not self.check_motor_step(eta, kappa, phi):
             raise KappaMoveAbort('Unsafe Kappa move aborted!')
 
-    def check_motor_step(self, eta, kappa, phi):
+    def _current_positions(self):
+        """Read the eta, kappa, and phi motor positions once."""
+        return (self.eta.position, self.kappa.position, self.phi.position)
+
+    def check_motor_step(self, eta, kappa, phi, current=None):
         """
         Check for the motor steps.
 
@@ -594,6 +804,9 @@ class Kappa(BaseInterface, PseudoPositioner, Device):
             Desired kappa destination position.
         phi : number
             Desired phi destination position.
+        current : tuple, optional
+            Already-read (eta, kappa, phi) positions to compare against.
+            If omitted, the positions are read once here.
 
         Returns
         -------
@@ -601,34 +814,26 @@ class Kappa(BaseInterface, PseudoPositioner, Device):
            `True` if motor step is smaller than the respective max step and/or
            the user has confirmed yes.
         """
-        eta_step = abs(eta - self.eta.position)
-        kappa_step = abs(kappa - self.kappa.position)
-        phi_step = abs(phi - self.phi.position)
-
-        is_eta_above_max = eta_step > self.eta_max_step
-        is_kappa_above_max = kappa_step > self.kappa_max_step
-        is_phi_above_max = phi_step > self.phi_max_step
-
-        if is_eta_above_max or is_kappa_above_max or is_phi_above_max:
-            d_str = '\nDo you really intend to do the following motions?\n'
-            t = PrettyTable(['Motor', 'Current position', 'to',
-                             'Target position'])
-            t.add_row(['eta', self.eta.position, '-->', eta])
-            t.add_row(['kappa', self.kappa.position, '-->', kappa])
-            t.add_row(['phi', self.phi.position, '-->', phi])
-            e_eta, e_chi, e_phi = self.k_to_e(eta=eta, kappa=kappa, phi=phi)
-            t.add_row(['e_eta', self.e_eta.position, '-->', e_eta])
-            t.add_row(['e_chi', self.e_chi.position, '-->', e_chi])
-            t.add_row(['e_phi', self.e_phi.position, '-->', e_phi])
-            print(d_str, t)
-
-            if input('  (y/n) ') == 'y':
-                move_on = True
-            else:
-                move_on = False
-        else:
-            move_on = True
-        return move_on
+        if current is None:
+            current = self._current_positions()
+        target = (eta, kappa, phi)
+        max_steps = (self.eta_max_step, self.kappa_max_step, self.phi_max_step)
+        if not any(abs(goal - pos) > max_step for goal, pos, max_step
+                   in zip(target, current, max_steps)):
+            return True
+
+        d_str = '\nDo you really intend to do the following motions?\n'
+        e_eta, e_chi, e_phi = self.k_to_e(eta=eta, kappa=kappa, phi=phi)
+        rows = [('eta', current[0], eta),
+                ('kappa', current[1], kappa),
+                ('phi', current[2], phi),
+                ('e_eta', self.e_eta.position, e_eta),
+                ('e_chi', self.e_chi.position, e_chi),
+                ('e_phi', self.e_phi.position, e_phi)]
+        t = '\n'.join([self._ROW_HEADER]
+                      + [self._ROW_FMT.format(*row) for row in rows])
+        print(d_str + t)
+        return input('  (y/n) ') == 'y'
 
     def format_status_info(self, status_info):
         """Override status info handler to render the Kappa object."""
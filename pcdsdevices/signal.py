@@ -1,18 +1,22 @@
 """
 Module to define ophyd Signal subclass utilities.
 """
-# Catch semi-frequent issue with scripts accidentally run from inside module
-if __name__ != 'pcdsdevices.signal':
+# Catch semi-frequent issue with scripts accidentally run from inside module,
+# where this file shadows the signal built-in. Other import names (tooling
+# that loads the file directly, pickling under an alias) are fine.
+if __name__ == 'signal':
     raise RuntimeError('A script tried to import pcdsdevices.signal '
                        'instead of the signal built-in module. This '
                        'usually happens when a script is run from '
                        'inside the pcdsdevices directory and can cause '
                        'extremely confusing bugs. Please run your script '
                        'elsewhere for better results.')
+import functools
 import logging
+import math
 import numbers
 import typing
-from threading import RLock
+from threading import RLock, Timer
 
 import numpy as np
 from ophyd.signal import (DerivedSignal, EpicsSignal, EpicsSignalBase,
@@ -58,22 +62,26 @@ def select_pytmc_class(io=None, *, prefix, write_cls, read_only_cls):
                          f'This is missing for signal with pv {prefix}. '
                          'Feel free to copy the io field from the '
                          'pytmc pragma.')
-    if pytmc_writable(io):
-        return write_cls
-    else:
-        return read_only_cls
+    return write_cls if pytmc_writable(io) else read_only_cls
+
+
+@functools.lru_cache(maxsize=16)
+def _normalize_io(io):
+    """Cached `pytmc.pragmas.normalize_io`, io has only a few spellings."""
+    return normalize_io(io)
+
+
+# Writability of each io direction that normalize_io can return
+_IO_WRITABLE = {'output': True, 'input': False}
 
 
 def pytmc_writable(io):
     """Returns `True` if the pytmc io arg represents a writable PV."""
-    norm = normalize_io(io)
-    if norm == 'output':
-        return True
-    elif norm == 'input':
-        return False
-    else:
+    try:
+        return _IO_WRITABLE[_normalize_io(io)]
+    except KeyError:
         # Should never get here unless pytmc's API changes
-        raise ValueError(f'Invalid io specifier {io}')
+        raise ValueError(f'Invalid io specifier {io}') from None
 
 
 class PytmcSignalRW(PytmcSignal, EpicsSignal):
@@ -127,21 +135,37 @@ class AggregateSignal(Signal):
 
     _sub_signals : list
         Signals that contribute to this signal.
+
+    _notify_debounce : float
+        If nonzero, bursts of sub-signal updates within this many seconds
+        are coalesced into one subscription update. Defaults to 0 (off).
+
+    _reducer : staticmethod, optional
+        A function such as ``np.all`` or ``np.sum`` that reduces the list of
+        cached values, in ``_sub_signals`` order, to the readback. If set,
+        subclasses do not need to implement ``_calc_readback``.
     """
 
     _update_only_on_change = True
+    _notify_debounce = 0
+    _reducer = None
 
     def __init__(self, *, name, **kwargs):
         super().__init__(name=name, **kwargs)
         self._cache = {}
         self._has_subscribed = False
+        self._seeding = False
+        self._notify_timer = None
+        self._notify_old_value = None
+        # Reentrant: _run_sub_value and get call _insert_value/_update_state
+        # with the lock held, and callbacks run by _run_subs may call get.
         self._lock = RLock()
         self._sub_signals = []
 
     def _calc_readback(self):
         """
         Override this with a calculation to find the current state given the
-        cached values.
+        cached values, or set ``_reducer`` instead.
 
         Returns
         -------
@@ -149,11 +173,22 @@ class AggregateSignal(Signal):
             The result of the calculation.
         """
 
-        raise NotImplementedError('Subclasses must implement _calc_readback')
+        if self._reducer is None:
+            raise NotImplementedError('Subclasses must implement '
+                                      '_calc_readback or set _reducer')
+        return self._reducer([self._cache[sig] for sig in self._sub_signals])
 
     def _insert_value(self, signal, value):
         """Update the cache with one value and recalculate."""
         with self._lock:
+            try:
+                # Repeated values (e.g. replays on reconnect) can't change
+                # the readback, so skip the recalculation
+                if bool(self._cache[signal] == value):
+                    return self._readback
+            except (KeyError, ValueError):
+                # Not cached yet, or an array with no single truth value
+                pass
             self._cache[signal] = value
             self._update_state()
             return self._readback
@@ -183,28 +218,78 @@ class AggregateSignal(Signal):
 
         cid = super().subscribe(cb, event_type=event_type, run=run)
         if event_type in (None, self.SUB_VALUE) and not self._has_subscribed:
-            # We need to subscribe to ALL relevant signals!
-            for signal in self._sub_signals:
-                signal.subscribe(self._run_sub_value, run=False)
-            self.get()  # Ensure we have a full cache
+            self._has_subscribed = True
+            with self._lock:
+                # We need to subscribe to ALL relevant signals!
+                # run=True seeds the cache with any value a signal has
+                # already reported, without asking the control system.
+                self._seeding = True
+                try:
+                    for signal in self._sub_signals:
+                        signal.subscribe(self._run_sub_value, run=True)
+                finally:
+                    self._seeding = False
+                # Only get the values we have not seen yet
+                for signal in self._sub_signals:
+                    if signal not in self._cache:
+                        self._cache[signal] = signal.get()
+                self._update_state()
         return cid
 
-    def _run_sub_value(self, *args, **kwargs):
-        kwargs.pop('sub_type')
-        sig = kwargs.pop('obj')
-        kwargs.pop('old_value')
-        value = kwargs['value']
+    def _run_sub_value(self, *args, obj, value, **kwargs):
         with self._lock:
+            if self._seeding:
+                # Still filling the cache in subscribe, nothing to report
+                self._cache[obj] = value
+                return
             old_value = self._readback
             # Update just one value and assume the rest are cached
             # This allows us to run subs without EPICS gets
-            value = self._insert_value(sig, value)
+            value = self._insert_value(obj, value)
+            if self._notify_debounce:
+                # Report once at the end of the window, from the first
+                # old value to the latest readback
+                if self._notify_timer is None:
+                    self._notify_old_value = old_value
+                    self._notify_timer = Timer(self._notify_debounce,
+                                               self._flush_notify)
+                    self._notify_timer.daemon = True
+                    self._notify_timer.start()
+                return
             if value != old_value or not self._update_only_on_change:
                 self._run_subs(sub_type=self.SUB_VALUE, obj=self, value=value,
                                old_value=old_value)
 
+    def _flush_notify(self):
+        """Run the subscriptions deferred by _notify_debounce."""
+        with self._lock:
+            self._notify_timer = None
+            value = self._readback
+            old_value = self._notify_old_value
+            if value != old_value or not self._update_only_on_change:
+                self._run_subs(sub_type=self.SUB_VALUE, obj=self, value=value,
+                               old_value=old_value)
+
+
+class InternalSignal(SignalRO):
+    """
+    Class Signal that stores info but should only be updated by the class.
+
+    SignalRO can be updated with _readback, but this does not process
+    callbacks. For the signal to behave normally, we need to bypass the put
+    override.
+
+    To put to one of these signals, simply call put with force=True
+    """
+
+    def put(self, value, *, timestamp=None, force=False):
+        return Signal.put(self, value, timestamp=timestamp, force=force)
+
+    def set(self, value, *, timestamp=None, force=False):
+        return Signal.set(self, value, timestamp=timestamp, force=force)
+
 
-class AvgSignal(Signal):
+class AvgSignal(InternalSignal):
     """
     Signal that acts as a rolling average of another signal.
 
@@ -217,6 +302,8 @@ class AvgSignal(Signal):
     Warning: this means that if we only have recieved ONE value, the mean will
     just be the mean of a single value!
 
+    The average is read-only from the outside, as with `InternalSignal`.
+
     Parameters
     ----------
     signal : Signal
@@ -233,6 +320,8 @@ class AvgSignal(Signal):
         if isinstance(signal, str):
             signal = getattr(parent, signal)
         self.raw_sig = signal
+        # Re-entrant so subscribers, which run while the lock is held to
+        # keep updates published in order, may use this signal
         self._lock = RLock()
         self.averages = averages
         self.raw_sig.subscribe(self._update_avg)
@@ -252,18 +341,48 @@ class AvgSignal(Signal):
         with self._lock:
             self._avg = avg
             self.index = 0
-            # Allocate uninitalized array
+            # Allocate uninitalized array, slots are only read once written
             self.values = np.empty(avg)
-            # Fill with nan
-            self.values.fill(np.nan)
+            self._filled = 0
+            # Running mean and count of the non-nan values in the buffer
+            self._mean = 0.0
+            self._nobs = 0
+
+    def _resync_mean(self):
+        """Recompute the running mean and count exactly from a full buffer."""
+        valid = self.values[~np.isnan(self.values)]
+        self._nobs = len(valid)
+        self._mean = float(valid.mean()) if self._nobs else 0.0
 
     def _update_avg(self, *args, value, **kwargs):
         """Add new value to the buffer, overriding old values if needed."""
         with self._lock:
+            # Store first so the float buffer normalizes the value (e.g. None
+            # becomes nan) before the running mean is touched.
+            old = self.values[self.index]
             self.values[self.index] = value
+            value = self.values[self.index]
+            # Swap the oldest value out of the running mean, skipping nan.
+            # Welford-style updates stay accurate for large, close values.
+            if self._filled == len(self.values):
+                if not math.isnan(old):
+                    self._nobs -= 1
+                    if self._nobs:
+                        self._mean += (self._mean - old) / self._nobs
+                    else:
+                        self._mean = 0.0
+            else:
+                self._filled += 1
+            if not math.isnan(value):
+                self._nobs += 1
+                self._mean += (value - self._mean) / self._nobs
             self.index = (self.index + 1) % len(self.values)
-            # This takes a mean, skipping nan values.
-            self.put(np.nanmean(self.values))
+            if self.index == 0:
+                # Once per pass over the buffer, resync from the stored
+                # values so rounding error can't build up over long runs.
+                self._resync_mean()
+            mean = self._mean if self._nobs else np.nan
+            Signal.put(self, mean, force=True)
 
 
 class NotImplementedSignal(SignalRO):
@@ -274,24 +393,6 @@ class NotImplementedSignal(SignalRO):
         super().__init__(value='Not implemented', **kwargs)
 
 
-class InternalSignal(SignalRO):
-    """
-    Class Signal that stores info but should only be updated by the class.
-
-    SignalRO can be updated with _readback, but this does not process
-    callbacks. For the signal to behave normally, we need to bypass the put
-    override.
-
-    To put to one of these signals, simply call put with force=True
-    """
-
-    def put(self, value, *, timestamp=None, force=False):
-        return Signal.put(self, value, timestamp=timestamp, force=force)
-
-    def set(self, value, *, timestamp=None, force=False):
-        return Signal.set(self, value, timestamp=timestamp, force=force)
-
-
 class _OptionalEpicsSignal(Signal):
     """
     An EPICS Signal which may or may not exist.
@@ -506,10 +607,10 @@ class UnitConversionDerivedSignal(DerivedSignal):
         information regarding units will be retrieved upon first connection.
 
     user_offset : any, optional
-        An optional user offset that will be *subtracted* when updating the
+        A user offset that will be *subtracted* when updating the
         original signal, and *added* when calculating the derived value.
         This offset should be supplied in ``derived_units`` and not
-        ``original_units``.
+        ``original_units``.  Defaults to 0, and may not be None.
 
         For example, if the original signal updates to a converted value of
         500 ``derived_units`` and the ``user_offset`` is set to 100, this
@@ -541,29 +642,48 @@ class UnitConversionDerivedSignal(DerivedSignal):
     def __init__(self, derived_from, *,
                  derived_units: str,
                  original_units: typing.Optional[str] = None,
-                 user_offset: typing.Optional[numbers.Real] = 0,
+                 user_offset: numbers.Real = 0,
                  limits: typing.Optional[typing.Tuple[numbers.Real,
                                                       numbers.Real]] = None,
                  **kwargs):
         self.derived_units = derived_units
         self.original_units = original_units
-        self._user_offset = user_offset
+        self._user_offset = self._check_user_offset(user_offset)
         self._custom_limits = limits
+        # ((original_units, derived_units), scale, offset)
+        self._conversion = (None, 1.0, 0.0)
+        # Connection state of the original signal, tracked from its
+        # metadata callbacks rather than polled on each recalculation
+        self._derived_connected = False
+        self._pending_recalc = False
         super().__init__(derived_from, **kwargs)
+        self._derived_connected = self._derived_from.connected
+
+    def _get_conversion(self):
+        '''
+        Get the (scale, offset) that take original units to derived units.
+
+        Unit conversions are affine, so these are found once with
+        ``convert_unit`` and reused until either set of units changes.
+        '''
+        units = (self.original_units, self.derived_units)
+        conversion = self._conversion
+        if conversion[0] != units:
+            offset = convert_unit(0.0, *units)
+            scale = convert_unit(1.0, *units) - offset
+            conversion = (units, scale, offset)
+            self._conversion = conversion
+        return conversion[1:]
 
     def forward(self, value):
         '''Compute derived signal value -> original signal value'''
-        if self.user_offset is None:
-            raise ValueError(f'{self.name} must be set to a non-None value.')
-        return convert_unit(value - self.user_offset,
-                            self.derived_units, self.original_units)
+        scale, offset = self._get_conversion()
+        return (value - self._user_offset - offset) / scale
 
     def inverse(self, value):
         '''Compute original signal value -> derived signal value'''
-        if self.user_offset is None:
-            raise ValueError(f'{self.name} must be set to a non-None value.')
-        return convert_unit(value, self.original_units,
-                            self.derived_units) + self.user_offset
+        scale, offset = self._get_conversion()
+        return value * scale + offset + self._user_offset
 
     @property
     def limits(self):
@@ -595,13 +715,23 @@ class UnitConversionDerivedSignal(DerivedSignal):
 
         self._custom_limits = tuple(value)
 
+    def _check_user_offset(self, offset):
+        """Reject a None offset up front so conversions need not check."""
+        if offset is None:
+            raise ValueError(
+                f'{self.__class__.__name__} user_offset must be set to a '
+                f'non-None value.'
+            )
+        return offset
+
     @property
-    def user_offset(self) -> typing.Optional[typing.Any]:
+    def user_offset(self) -> typing.Any:
         """A user-specified offset in *derived*, user-facing units."""
         return self._user_offset
 
     @user_offset.setter
     def user_offset(self, offset):
+        self._check_user_offset(offset)
         offset_change = -self._user_offset + offset
         self._user_offset = offset
         self._recalculate_position()
@@ -615,9 +745,11 @@ class UnitConversionDerivedSignal(DerivedSignal):
         """
         Recalculate the derived position and send subscription updates.
 
-        No-operation if the original signal is not connected.
+        If the original signal is not connected, this is deferred until the
+        next connection callback.
         """
-        if not self._derived_from.connected:
+        if not self._derived_connected:
+            self._pending_recalc = True
             return
 
         value = self._derived_from.get()
@@ -626,10 +758,14 @@ class UnitConversionDerivedSignal(DerivedSignal):
             self._derived_value_callback(value)
 
     def _derived_metadata_callback(self, *, connected, **kwargs):
+        self._derived_connected = connected
         super()._derived_metadata_callback(connected=connected, **kwargs)
         if connected and 'units' in kwargs:
             if self.original_units is None:
                 self.original_units = kwargs['units']
+        if connected and self._pending_recalc:
+            self._pending_recalc = False
+            self._recalculate_position()
 
     def describe(self):
         full_desc = super().describe()
@@ -4,9 +4,10 @@ from unittest.mock import patch
 import numpy as np
 import pytest
 from ophyd.sim import make_fake_device
+from ophyd.utils import LimitError
 
-from pcdsdevices.gon import (BaseGon, Goniometer, GonWithDetArm, Kappa, SamPhi,
-                             SimKappa, XYZStage)
+from pcdsdevices.gon import (BaseGon, EulerCoord, Goniometer, GonWithDetArm,
+                             Kappa, KappaCoord, SamPhi, SimKappa, XYZStage)
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +56,27 @@ def test_gon_init():
             prefix_eta='eta', prefix_kappa='kappa', prefix_phi='phi')
 
 
+@pytest.mark.timeout(5)
+def test_gon_lazy_motors():
+    logger.debug('test_gon_lazy_motors')
+    gon = make_fake_device(GonWithDetArm)(
+        name='test', prefix_hor='hor', prefix_ver='ver', prefix_rot='rot',
+        prefix_tip='tip', prefix_tilt='tilt', prefix_detver='detver',
+        prefix_dettilt='dettilt', prefix_2theta='2theta')
+    xyz = make_fake_device(XYZStage)(name='test', prefix_x='x',
+                                     prefix_y='y', prefix_z='z')
+    samphi = make_fake_device(SamPhi)(name='test', prefix_samz='samz',
+                                      prefix_samphi='samphi')
+    kappa = make_fake_device(Kappa)(name='test', prefix_x='x', prefix_y='y',
+                                    prefix_z='z', prefix_eta='eta',
+                                    prefix_kappa='kappa', prefix_phi='phi')
+    # No motors are made until they are first accessed
+    for stage in (gon, xyz, samphi, kappa.sample_stage):
+        assert not stage._signals
+    assert kappa.x is kappa.sample_stage.x
+    assert list(kappa.sample_stage._signals) == ['x']
+
+
 @pytest.mark.timeout(5)
 def test_gon_disconnected():
     logger.debug('test_gon_disconnected')
@@ -70,11 +92,27 @@ def test_gon_disconnected():
           prefix_eta='eta', prefix_kappa='kappa', prefix_phi='phi')
 
 
+@pytest.mark.timeout(5)
+def test_gon_disconnected_not_connected():
+    logger.debug('test_gon_disconnected_not_connected')
+    gon = BaseGon(name='test1', prefix_hor='hor', prefix_ver='ver',
+                  prefix_rot='rot', prefix_tip='tip', prefix_tilt='tilt')
+    # Motors not yet created must still count against the connection
+    assert not gon._signals
+    assert not gon.connected
+    xyz = XYZStage(name='test3', prefix_x='x', prefix_y='y', prefix_z='z')
+    assert not xyz.connected
+    samphi = SamPhi(name='test4', prefix_samz='samz', prefix_samphi='samphi')
+    assert not samphi.connected
+
+
 def test_k_to_e(fake_kappa):
     # modified test based on calculation fixes
     expected_res = (-27.51268029508058, 10.713563480515766, -50.51268029508058)
     result = fake_kappa.k_to_e(eta=23, kappa=14, phi=46)
     assert np.isclose(expected_res, result).all()
+    assert isinstance(result, EulerCoord)
+    assert result.e_chi == result[1]
     # test with constructor's params
     expected_res = (-16.46635439427449, 15.28854011258886, -36.4663543942744)
     result = fake_kappa.k_to_e()
@@ -86,6 +124,8 @@ def test_e_to_k(fake_kappa):
     expected_res = (-28.9135906952099, 18.3080599808285, -51.9135906952099)
     result = fake_kappa.e_to_k(e_eta=23, e_chi=14, e_phi=46)
     assert np.isclose(expected_res, result).all()
+    assert isinstance(result, KappaCoord)
+    assert result.kappa == result[1]
     # test with constructor's params
     # when positions are: eta = 10, kappa = 20, phi = 30, angle = 50
     # the coordinates are:
@@ -166,6 +206,8 @@ def test_check_motor_step(fake_kappa):
     with patch('builtins.input', return_value='n'):
         res = fake_kappa.check_motor_step(5, 14, 23)
     assert res is False
+    # compare against positions the caller has already read
+    assert fake_kappa.check_motor_step(5, 14, 23, current=(6, 15, 24))
 
 
 @pytest.mark.timeout(5)
@@ -225,3 +267,126 @@ def test_kappa_calculations_big_kap(fake_kappa, eta, kappa, phi):
     assert np.isclose(eta, k_eta)
     assert np.isclose(kappa, k_kap)
     assert np.isclose(phi, k_phi)
+
+
+def test_kappa_ang_change(fake_kappa):
+    e_coords = fake_kappa.k_to_e(10, 20, 30)
+    fake_kappa.kappa_ang = 60
+    assert fake_kappa.kappa_ang == 60
+    assert not np.isclose(e_coords, fake_kappa.k_to_e(10, 20, 30)).all()
+    k_coords = fake_kappa.e_to_k(*fake_kappa.k_to_e(10, 20, 30))
+    assert np.isclose(k_coords, (10, 20, 30)).all()
+
+
+@pytest.mark.parametrize("kappa_pos", [20, 225])
+def test_kappa_array_calculations(fake_kappa, kappa_pos):
+    fake_kappa.kappa.move(kappa_pos, wait=True)
+    eta = np.array([0, 1, 10, 45, -10])
+    kappa = np.array([0, 2, 20, 45, 25]) + (kappa_pos > 180) * 225
+    phi = np.array([0, 3, 30, 45, -30])
+    e_coords = fake_kappa.k_to_e_array(eta, kappa, phi)
+    for i in range(len(eta)):
+        expected = fake_kappa.k_to_e(eta[i], kappa[i], phi[i])
+        assert np.isclose([arr[i] for arr in e_coords], expected).all()
+    k_eta, k_kap, k_phi = fake_kappa.e_to_k_array(*e_coords)
+    assert np.isclose(eta, k_eta).all()
+    assert np.isclose(kappa, k_kap).all()
+    assert np.isclose(phi, k_phi).all()
+
+
+@pytest.mark.timeout(5)
+def test_gon_connect_all():
+    FakeGon = make_fake_device(GonWithDetArm)
+    gon = FakeGon(name='test', prefix_hor='hor', prefix_ver='ver',
+                  prefix_rot='rot', prefix_tip='tip', prefix_tilt='tilt',
+                  prefix_detver='detver', prefix_dettilt='dettilt',
+                  prefix_2theta='2theta')
+    assert not gon._signals
+    gon.connect_all(timeout=1)
+    assert set(gon._signals) == set(gon.component_names)
+    assert all(motor.connected for motor in gon._signals.values())
+    FakeKappa = make_fake_device(Kappa)
+    kappa = FakeKappa(name='test', prefix_x='x', prefix_y='y', prefix_z='z',
+                      prefix_eta='eta', prefix_kappa='kappa', prefix_phi='phi')
+    for motor in (kappa.eta, kappa.kappa, kappa.phi):
+        # Fake real motors need a first readback to finish connecting
+        motor.user_readback.sim_put(0)
+    kappa.connect_all(timeout=1)
+    stage = kappa.sample_stage
+    assert set(stage._signals) == {'x', 'y', 'z'}
+    assert all(motor.connected for motor in stage._signals.values())
+    assert 'connect_all' in dir(gon)
+    assert 'connect_all' in dir(kappa)
+    FakeSamPhi = make_fake_device(SamPhi)
+    samphi = FakeSamPhi(name='test', prefix_samz='samz',
+                        prefix_samphi='samphi')
+    samphi.connect_all(timeout=1)
+    assert samphi.connected
+
+
+def test_k_to_e_cache(fake_kappa):
+    result = fake_kappa.k_to_e()
+    assert fake_kappa.k_to_e() is result
+    fake_kappa.eta.move(11)
+    assert fake_kappa.k_to_e() is not result
+    assert np.isclose(fake_kappa.k_to_e(), fake_kappa.k_to_e(11, 20, 30)).all()
+
+
+@pytest.mark.timeout(5)
+@pytest.mark.parametrize("axis,target", [
+    ('e_eta', -15), ('e_chi', 16), ('e_phi', -35),
+    ])
+def test_single_axis_move(fake_kappa, axis, target):
+    start = fake_kappa.k_to_e()._asdict()
+    with patch('builtins.input', return_value='y'):
+        getattr(fake_kappa, axis).mv(target)
+    end = fake_kappa.k_to_e()._asdict()
+    for name, value in end.items():
+        if name == axis:
+            assert np.isclose(value, target)
+        else:
+            assert np.isclose(value, start[name])
+
+
+@pytest.mark.timeout(5)
+def test_kappa_wait(fake_kappa):
+    fake_kappa.eta.mv(12)
+    fake_kappa.kappa.mv(22)
+    fake_kappa.phi.mv(32)
+    fake_kappa.wait(timeout=1)
+    assert fake_kappa.eta.position == 12
+    assert fake_kappa.kappa.position == 22
+    assert fake_kappa.phi.position == 32
+
+
+def test_explicit_zero_args(fake_kappa):
+    # Zero and tiny values must be used as given, not swapped for live ones
+    assert np.isclose(fake_kappa.k_to_e(0, 0, 0), (0, 0, 0)).all()
+    assert np.isclose(fake_kappa.k_to_e(np.float64(1e-300), 0.0, 0),
+                      (0, 0, 0)).all()
+    assert np.isclose(fake_kappa.e_to_k(0, 0, 0), (0, 0, 0)).all()
+
+
+def test_e_to_k_partial_args(fake_kappa):
+    live = fake_kappa.k_to_e()
+    with patch.object(fake_kappa, 'k_to_e', wraps=fake_kappa.k_to_e) as k2e:
+        result = fake_kappa.e_to_k(e_chi=live.e_chi)
+    k2e.assert_called_once_with()
+    assert np.isclose(result, (10, 20, 30)).all()
+
+
+def test_e_to_k_unreachable(fake_kappa):
+    with pytest.raises(LimitError, match='e_chi=120'):
+        fake_kappa.e_to_k(0, 120, 0)
+    with pytest.raises(LimitError):
+        fake_kappa.e_chi.move(120)
+    assert fake_kappa.kappa.position == 20
+
+
+def test_e_to_k_array_unreachable(fake_kappa):
+    with pytest.warns(RuntimeWarning):
+        k_eta, k_kap, k_phi = fake_kappa.e_to_k_array([0, 0], [10, 120],
+                                                      [0, 0])
+    assert np.isclose((k_eta[0], k_kap[0], k_phi[0]),
+                      fake_kappa.e_to_k(0, 10, 0)).all()
+    assert np.isnan((k_eta[1], k_kap[1], k_phi[1])).all()
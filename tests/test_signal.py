@@ -1,13 +1,17 @@
 import logging
 import threading
+import time
 from unittest.mock import Mock
 
+import numpy as np
+import pytest
 from ophyd.signal import EpicsSignal, EpicsSignalRO, Signal
 from ophyd.sim import FakeEpicsSignal
+from ophyd.utils import ReadOnlyError
 
 import pcdsdevices
-from pcdsdevices.signal import (AvgSignal, PytmcSignal,
-                                UnitConversionDerivedSignal)
+from pcdsdevices.signal import (AggregateSignal, AvgSignal, PytmcSignal,
+                                UnitConversionDerivedSignal, pytmc_writable)
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +25,122 @@ def test_pytmc_signal():
     assert isinstance(rwsig, PytmcSignal)
     assert isinstance(rosig, EpicsSignalRO)
     assert isinstance(rosig, PytmcSignal)
+    assert pytmc_writable('o')
+    assert pytmc_writable('output')
+    assert not pytmc_writable('input')
+    with pytest.raises(ValueError):
+        pytmc_writable('sideways')
+
+
+class SumSignal(AggregateSignal):
+    """Simple AggregateSignal used to check the shared machinery."""
+    def __init__(self, *signals, name):
+        super().__init__(name=name)
+        self._sub_signals.extend(signals)
+        self.calc_count = 0
+
+    def _calc_readback(self):
+        self.calc_count += 1
+        return sum(self._cache[sig] for sig in self._sub_signals)
+
+
+def test_aggregate_signal():
+    logger.debug('test_aggregate_signal')
+    sig1 = Signal(name='sig1', value=1)
+    sig2 = Signal(name='sig2', value=2)
+    agg = SumSignal(sig1, sig2, name='agg')
+
+    cb = Mock()
+    agg.subscribe(cb, run=False)
+    assert agg.get() == 3
+    sig1.put(5)
+    assert agg.get() == 7
+    assert cb.call_args[1]['value'] == 7
+    assert cb.call_args[1]['old_value'] == 3
+
+
+class AllSignal(AggregateSignal):
+    """AggregateSignal that uses a numpy reducer for its readback."""
+    _reducer = staticmethod(np.all)
+
+    def __init__(self, *signals, name):
+        super().__init__(name=name)
+        self._sub_signals.extend(signals)
+
+
+def test_aggregate_signal_reducer():
+    logger.debug('test_aggregate_signal_reducer')
+    sig1 = Signal(name='sig1', value=1)
+    sig2 = Signal(name='sig2', value=0)
+    agg = AllSignal(sig1, sig2, name='agg')
+    agg.subscribe(Mock(), run=False)
+    assert not agg.get()
+    sig2.put(1)
+    assert agg._readback
+
+
+def test_aggregate_signal_repeat_value():
+    logger.debug('test_aggregate_signal_repeat_value')
+    sig1 = Signal(name='sig1', value=1)
+    sig2 = Signal(name='sig2', value=2)
+    agg = SumSignal(sig1, sig2, name='agg')
+    agg.subscribe(Mock(), run=False)
+
+    count = agg.calc_count
+    # Same value again: no recalculation needed
+    sig1.put(1)
+    assert agg.calc_count == count
+    sig1.put(4)
+    assert agg.calc_count == count + 1
+
+
+def test_aggregate_signal_subscribe_cache():
+    logger.debug('test_aggregate_signal_subscribe_cache')
+    sig1 = Signal(name='sig1', value=1)
+    sig2 = Signal(name='sig2', value=2)
+    # sig1 has already reported a value, sig2 has not
+    sig1.put(3)
+    sig1.get = Mock(wraps=sig1.get)
+    sig2.get = Mock(wraps=sig2.get)
+    agg = SumSignal(sig1, sig2, name='agg')
+
+    agg.subscribe(Mock(), run=False)
+    assert agg._readback == 5
+    sig1.get.assert_not_called()
+    sig2.get.assert_called_once()
+
+    # Later subscriptions reuse the existing sub-signal subscriptions
+    agg.subscribe(Mock(), run=False)
+    count = agg.calc_count
+    sig2.put(4)
+    assert agg.calc_count == count + 1
+    assert agg._readback == 7
+
+
+@pytest.mark.timeout(5)
+def test_aggregate_signal_debounce():
+    logger.debug('test_aggregate_signal_debounce')
+    sig1 = Signal(name='sig1', value=1)
+    sig2 = Signal(name='sig2', value=2)
+    agg = SumSignal(sig1, sig2, name='agg')
+    agg._notify_debounce = 0.1
+
+    event = threading.Event()
+    cb = Mock()
+
+    def callback(**kwargs):
+        cb(**kwargs)
+        event.set()
+
+    agg.subscribe(callback, run=False)
+    sig1.put(2)
+    sig2.put(3)
+    sig1.put(4)
+    assert not cb.called
+    assert event.wait(1)
+    cb.assert_called_once()
+    assert cb.call_args[1]['old_value'] == 3
+    assert cb.call_args[1]['value'] == 7
 
 
 def test_avg_signal():
@@ -51,6 +171,105 @@ def test_avg_signal():
     sig.put(0)
     assert cb.called
 
+    with pytest.raises(ReadOnlyError):
+        avg.put(10)
+
+
+def test_avg_signal_nan():
+    logger.debug('test_avg_signal_nan')
+    sig = Signal(name='raw')
+    avg = AvgSignal(sig, 3, name='avg')
+
+    sig.put(np.nan)
+    assert np.isnan(avg.get())
+    sig.put(2)
+    assert avg.get() == 2
+    sig.put(4)
+    assert avg.get() == 3
+    # Pushes out the nan, which never counted toward the mean
+    sig.put(6)
+    assert avg.get() == 4
+    sig.put(np.nan)
+    assert avg.get() == 5
+
+
+def test_avg_signal_none():
+    logger.debug('test_avg_signal_none')
+    sig = Signal(name='raw')
+    avg = AvgSignal(sig, 4, name='avg')
+
+    # None is stored as nan and skipped, like np.nanmean would
+    sig.put(1.0)
+    sig.put(None)
+    sig.put(None)
+    sig.put(2.0)
+    assert avg.get() == 1.5
+    sig.put(None)
+    assert avg.get() == 2
+    sig.put(4.0)
+    assert avg.get() == 3
+
+
+@pytest.mark.timeout(5)
+def test_avg_signal_callback_reentry():
+    logger.debug('test_avg_signal_callback_reentry')
+    sig = Signal(name='raw')
+    avg = AvgSignal(sig, 2, name='avg')
+
+    def resize(*, value, **kwargs):
+        # Callbacks can reconfigure the signal without deadlocking
+        if value == 1:
+            avg.averages = 3
+
+    avg.subscribe(resize, run=False)
+    sig.put(1)
+    assert avg.averages == 3
+
+
+@pytest.mark.timeout(5)
+def test_avg_signal_threaded_order():
+    logger.debug('test_avg_signal_threaded_order')
+    sig = Signal(name='raw')
+    avg = AvgSignal(sig, 10, name='avg')
+    active = []
+    overlaps = []
+
+    def slow_callback(**kwargs):
+        # Updates from other threads must wait for this one to publish
+        if active:
+            overlaps.append(kwargs['value'])
+        active.append(True)
+        time.sleep(0.001)
+        active.pop()
+
+    avg.subscribe(slow_callback, run=False)
+
+    def put_values():
+        for value in range(10):
+            sig.put(value)
+
+    threads = [threading.Thread(target=put_values) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not overlaps
+    # The last mean published matches the final buffer contents
+    assert np.isclose(avg.get(), np.mean(avg.values))
+
+
+def test_avg_signal_no_drift():
+    logger.debug('test_avg_signal_no_drift')
+    sig = Signal(name='raw')
+    avg = AvgSignal(sig, 10, name='avg')
+
+    # Large offset values that would lose precision in a naive running sum
+    rng = np.random.default_rng(0)
+    values = 1e9 + rng.random(10_003)
+    for value in values:
+        sig.put(value)
+    assert np.isclose(avg.get(), np.mean(values[-10:]), rtol=0, atol=1e-6)
+
 
 def test_unit_conversion_signal():
     orig = FakeEpicsSignal('sig', name='orig')
@@ -88,6 +307,60 @@ def test_unit_conversion_signal():
     assert converted.get() == 20_000
 
 
+def test_unit_conversion_signal_units_change():
+    orig = FakeEpicsSignal('sig', name='orig')
+    orig.sim_put(5)
+
+    converted = UnitConversionDerivedSignal(
+        derived_from=orig,
+        original_units='m',
+        derived_units='mm',
+        name='converted',
+    )
+    assert converted.get() == 5_000
+    converted.derived_units = 'um'
+    assert np.isclose(converted.get(), 5_000_000)
+    assert np.isclose(converted.forward(1_000_000), 1)
+
+
+def test_unit_conversion_signal_none_offset():
+    orig = FakeEpicsSignal('sig', name='orig')
+    with pytest.raises(ValueError):
+        UnitConversionDerivedSignal(derived_from=orig, original_units='m',
+                                    derived_units='mm', user_offset=None,
+                                    name='converted')
+    converted = UnitConversionDerivedSignal(derived_from=orig,
+                                            original_units='m',
+                                            derived_units='mm',
+                                            name='converted')
+    with pytest.raises(ValueError):
+        converted.user_offset = None
+    assert converted.user_offset == 0
+
+
+def test_unit_conversion_signal_pending_recalc():
+    orig = FakeEpicsSignal('sig', name='orig')
+    orig.sim_put(5)
+    converted = UnitConversionDerivedSignal(derived_from=orig,
+                                            original_units='m',
+                                            derived_units='mm',
+                                            name='converted')
+    cb = Mock()
+    converted.subscribe(cb, run=False)
+
+    orig._metadata['connected'] = False
+    orig._run_subs(sub_type=orig.SUB_META, **orig._metadata)
+    converted.user_offset = 1
+    assert converted._pending_recalc
+    cb.assert_not_called()
+
+    orig._metadata['connected'] = True
+    orig._run_subs(sub_type=orig.SUB_META, **orig._metadata)
+    assert not converted._pending_recalc
+    cb.assert_called_once()
+    assert cb.call_args[1]['value'] == 5_001
+
+
 def test_optional_epics_signal(monkeypatch):
     monkeypatch.setattr(pcdsdevices.signal, 'EpicsSignal', FakeEpicsSignal)
     opt = pcdsdevices.signal._OptionalEpicsSignal('test', name='opt')